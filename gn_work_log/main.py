@@ -1,19 +1,27 @@
+from array import array
+import bisect
+import functools
 import os
-import shutil
-from dateutil import relativedelta
 import pathlib
-from strenum import StrEnum
-import argparse
-from typing import Optional, List, Any, Tuple
+import stat
+import sys
+from typing import Optional, List, Any
 import datetime
-import toml
+import tomli_w
 import uuid
-import jinja2
-import tempfile
-import subprocess
 
 import json
 
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+if sys.version_info >= (3, 11):
+    from enum import StrEnum
+else:
+    from strenum import StrEnum
+
 from gn_work_log import tasks
 
 
@@ -24,48 +32,99 @@ class Actions(StrEnum):
     NOTE = "note"
 
 
+@functools.cache
+def _monthly_template():
+    """
+    The jinja environment and template are built once per process and reused.
+    """
+    import jinja2
+
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(pathlib.Path(__file__).parent / "templates"),
+        autoescape=jinja2.select_autoescape(),
+        cache_size=-1,
+    )
+    return env.get_template("monthly_log.tex.jinja")
+
+
 class TomlDocument:
     def __init__(self, filename: str, working_date: datetime.date) -> None:
         self.filename = pathlib.Path(filename)
         self.working_date = working_date
         self._create_empty_doc()
-        self.other_data, self.tasks_data = self._parse()
+        self._dirty: set[str] = set()
+        self.tasks_data: dict[str, List[tasks.Task]] = {}
+        # date -> uuid string -> tasks, built when a date is first looked up
+        self._uuid_index: dict[str, dict[str, List[tasks.Task]]] = {}
+        self._raw = self._parse()
+        self._raw_tasks_by_date: dict[str, List[dict]] = {
+            key: value for key, value in self._raw.items() if isinstance(value, list)
+        }
+        self._sorted_keys = sorted(self._raw_tasks_by_date)
 
     def _create_empty_doc(self) -> None:
         if self.filename.exists():
             return
         toml_content = {"version": "0.0.0"}
-        with open(self.filename, "w") as f:
-            toml.dump(toml_content, f)
-
-    def _parse(self) -> Tuple[dict[str, Any], dict[str, List[tasks.Task]]]:
-        with open(self.filename) as f:
-            data = toml.load(f)
-            tasks_data = {}
-            other_data = {}
-            for key, value in data.items():
-                if not isinstance(value, list):
-                    other_data[key] = value
-                    continue
-                parsed_tasks = [tasks.TomlHelper.deserialize(x) for x in value]
-                tasks_data[key] = parsed_tasks
-            return other_data, tasks_data
+        self.filename.write_bytes(tomli_w.dumps(toml_content).encode())
+
+    def _parse(self) -> dict[str, Any]:
+        return tomllib.loads(self.filename.read_bytes().decode())
+
+    def tasks_for(self, key: str) -> Optional[List[tasks.Task]]:
+        if key not in self._raw_tasks_by_date:
+            return None
+        return self._load_tasks(key)
+
+    def _load_tasks(self, key: str) -> List[tasks.Task]:
+        """
+        Tasks for a date in the log, deserialized the first time they are requested and reused afterwards.
+        """
+        if key not in self.tasks_data:
+            self.tasks_data[key] = [
+                tasks.TomlHelper.deserialize(x) for x in self._raw_tasks_by_date[key]
+            ]
+        return self.tasks_data[key]
+
+    def _keys_between(self, start: datetime.date, end: datetime.date) -> List[str]:
+        """
+        Date keys from start up to but excluding end, iso dates sort the same way as strings.
+        """
+        lo = bisect.bisect_left(self._sorted_keys, start.isoformat())
+        hi = bisect.bisect_left(self._sorted_keys, end.isoformat())
+        return self._sorted_keys[lo:hi]
+
+    def _tasks_by_uuid(self, key: str) -> dict[str, List[tasks.Task]]:
+        """
+        Tasks keyed by uuid, in lists since a uuid can repeat within a day.
+        """
+        if key not in self._uuid_index:
+            index: dict[str, List[tasks.Task]] = {}
+            for t in self.tasks_for(key) or []:
+                index.setdefault(t._uuid_str, []).append(t)
+            self._uuid_index[key] = index
+        return self._uuid_index[key]
 
     def add_task(self, description: str, date: datetime.date):
         task = tasks.Task(
             uuid=uuid.uuid4(),
             description=description,
             status=tasks.TaskStates.CREATED,
-            times=[],
         )
         today_key = date.isoformat()
-        self.tasks_data.setdefault(today_key, [])
-        self.tasks_data[today_key].append(task)
+        if today_key not in self._raw_tasks_by_date:
+            self._raw_tasks_by_date[today_key] = []
+            bisect.insort(self._sorted_keys, today_key)
+        today_tasks = self._load_tasks(today_key)
+        today_tasks.append(task)
+        if today_key in self._uuid_index:
+            self._uuid_index[today_key].setdefault(task._uuid_str, []).append(task)
+        self._dirty.add(today_key)
         self.write()
-        print(f"task added: {task.uuid}")
+        print(f"task added: {task._uuid_str}")
 
     def report_daily_json(self):
-        corresponding_tasks = self.tasks_data.get(self.working_date.isoformat())
+        corresponding_tasks = self.tasks_for(self.working_date.isoformat())
         if corresponding_tasks is None:
             print(json.dumps("No tasks found"))
             return
@@ -79,80 +138,97 @@ class TomlDocument:
         if output_format == "json":
             self.report_daily_json()
             return
-        corresponding_tasks = self.tasks_data.get(self.working_date.isoformat())
+        corresponding_tasks = self.tasks_for(self.working_date.isoformat())
         if corresponding_tasks is None:
             print("No tasks found")
             return
         total_time = 0
+        out: List[str] = []
         for t in corresponding_tasks:
             if output_format == "email":
-                print(t.terminal_report())
+                out.append(t.terminal_report())
             elif output_format == "terminal":
-                print(t.terminal_report_with_uuid())
+                out.append(t.terminal_report_with_uuid())
             else:
                 raise NotImplementedError(
                     f"Output format: {output_format} not supported"
                 )
             total_time += t.minutes()
-        print(f"Total time: {total_time // 60} Hrs { total_time % 60 } minutes")
+        out.append(f"Total time: {total_time // 60} Hrs { total_time % 60 } minutes")
+        # one write instead of a print per line
+        sys.stdout.write("\n".join(out) + "\n")
 
     def report_monthly(self):
+        from dateutil import relativedelta
+
         start = datetime.date(self.working_date.year, self.working_date.month, 1)
         end = start + relativedelta.relativedelta(months=1)
-        total_time = 0
-        for date_str, ts in self.tasks_data.items():
-            iso_date = datetime.date.fromisoformat(date_str)
-            if not start <= iso_date < end:
-                continue
-            print(date_str)
-            for t in ts:
-                total_time += t.minutes()
-                print(t.terminal_report())
-        print(f"Total time: {total_time // 60} Hrs { total_time % 60 } minutes")
+        # every time in the month flattened into epoch second columns
+        starts: array[int] = array("q")
+        ends: array[int] = array("q")
+        out: List[str] = []
+        for date_str in self._keys_between(start, end):
+            out.append(date_str)
+            for t in self._load_tasks(date_str):
+                t_starts, t_ends = t.intervals()
+                starts.extend(t_starts)
+                ends.extend(t_ends)
+                out.append(t.terminal_report())
+        total_time = tasks.sum_minutes(starts, ends)
+        out.append(f"Total time: {total_time // 60} Hrs { total_time % 60 } minutes")
+        sys.stdout.write("\n".join(out) + "\n")
 
     def monthly_pdf(self):
-        current_folder = pathlib.Path(__file__).parent
-        env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(current_folder / "templates"),
-            autoescape=jinja2.select_autoescape(),
-        )
+        import subprocess
+        from dateutil import relativedelta
+
         start = datetime.date(self.working_date.year, self.working_date.month, 1)
         end = start + relativedelta.relativedelta(months=1)
-        template = env.get_template("monthly_log.tex.jinja")
-        total_time = 0
+        # every time in the month flattened into epoch second columns
+        starts: array[int] = array("q")
+        ends: array[int] = array("q")
         filtered_data = {}
-        for date_str, ts in self.tasks_data.items():
-            iso_date = datetime.date.fromisoformat(date_str)
-            if not start <= iso_date < end:
-                continue
+        for date_str in self._keys_between(start, end):
+            ts = self._load_tasks(date_str)
             filtered_data[date_str] = ts
             for t in ts:
-                total_time += t.minutes()
+                t_starts, t_ends = t.intervals()
+                starts.extend(t_starts)
+                ends.extend(t_ends)
+        total_time = tasks.sum_minutes(starts, ends)
         summary_msg = f"Total time: {total_time // 60} Hrs { total_time % 60 } minutes"
-        final_filename = f"/tmp/Work_Log_For_{start.year}_{start.month}.pdf"
-        with tempfile.NamedTemporaryFile(suffix=".tex") as fp:
-            content = template.render(dates=filtered_data, summary=summary_msg)
-            fp.write(content.encode())
-            fp.flush()
-            pdflatex_flags = [
-                "pdflatex",
-                "-halt-on-error",
-                "-output-directory",
-                "/tmp",
-                "-output-format=pdf",
-                fp.name,
-            ]
-            temporary_path = pathlib.Path(fp.name)
-            subprocess.run(pdflatex_flags)
-            shutil.move(
-                f"/tmp/{temporary_path.name.replace('.tex', '.pdf')}", final_filename
-            )
+        jobname = f"Work_Log_For_{start.year}_{start.month}"
+        final_filename = f"/tmp/{jobname}.pdf"
+        content = _monthly_template().render(dates=filtered_data, summary=summary_msg)
+        # pdflatex reads the document from stdin as terminal lines and names its output
+        # after the jobname. Batch and nonstop modes stop after the first line.
+        pdflatex_flags = [
+            "pdflatex",
+            "-halt-on-error",
+            "-no-shell-escape",
+            "-output-directory",
+            "/tmp",
+            "-jobname",
+            jobname,
+            "-output-format=pdf",
+        ]
+        subprocess.run(
+            pdflatex_flags,
+            input=content.encode(),
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
         print(f"Pdf file located at: {final_filename}")
 
     def update_task(self, uuid: str, action: Actions, note: Optional[str] = None):
         working_key = self.working_date.isoformat()
-        today_tasks = self.tasks_data[working_key]
-        relevant_tasks = [x for x in today_tasks if uuid in str(x.uuid)]
+        tasks_by_uuid = self._tasks_by_uuid(working_key)
+        if uuid in tasks_by_uuid:
+            relevant_tasks = tasks_by_uuid[uuid]
+        else:
+            relevant_tasks = [
+                t for key, ts in tasks_by_uuid.items() if uuid in key for t in ts
+            ]
         if len(relevant_tasks) == 0:
             raise LookupError(
                 f"No tasks found. Try to use the correct uuid. Used {uuid}"
@@ -173,6 +249,7 @@ class TomlDocument:
                 if not note:
                     raise AttributeError(f"Expected valid note but got {note}")
                 relevant_task.add_note(note)
+        self._dirty.add(working_key)
         self.write()
 
     def errors(self):
@@ -182,9 +259,15 @@ class TomlDocument:
         today = datetime.datetime.now(datetime.timezone.utc).date()
         today_key = today.isoformat()
         errors = {}
-        for date, ts in self.tasks_data.items():
+        for date, raw_tasks in self._raw_tasks_by_date.items():
             if date == today_key:
                 continue
+            # unloaded days are checked on raw status so they aren't deserialized
+            if date not in self.tasks_data and all(
+                x.get("status") == tasks.TaskStates.COMPLETED for x in raw_tasks
+            ):
+                continue
+            ts = self._load_tasks(date)
             error_tasks = [t for t in ts if t.status != tasks.TaskStates.COMPLETED]
             if error_tasks:
                 errors[date] = error_tasks
@@ -197,15 +280,70 @@ class TomlDocument:
                 print(t.terminal_report_with_uuid())
 
     def write(self):
-        serialized_data = self.other_data.copy()
-        for date, date_tasks in self.tasks_data.items():
-            serialized_tasks = [tasks.TomlHelper.serialize(t) for t in date_tasks]
-            serialized_data[date] = serialized_tasks
-        with open(self.filename, "w") as f:
-            toml.dump(serialized_data, f)
+        """
+        Only days that were changed are serialized again, the rest are written back as they were parsed.
+        Within a changed day, tasks that weren't modified reuse the dict they were parsed from.
+        """
+        for date in self._dirty:
+            self._raw[date] = [
+                t._source_dict
+                if t._source_dict is not None
+                else tasks.TomlHelper.serialize(t)
+                for t in self.tasks_data[date]
+            ]
+        self._dirty.clear()
+        content = tomli_w.dumps(self._raw).encode()
+        # resolve symlinks so the real log is replaced, not the link
+        target = self.filename.resolve()
+        tmp = target.with_name(target.name + ".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, stat.S_IMODE(target.stat().st_mode))
+            # the log is either the old or the new version, never a partial write
+            os.replace(tmp, target)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+
+_FAST_ACTIONS = {
+    "--start": Actions.START,
+    "--pause": Actions.PAUSE,
+    "--complete": Actions.COMPLETE,
+}
+
+
+def _fast_update_task(argv: List[str]) -> bool:
+    """
+    Handles `--task <task> --start|--pause|--complete` on the WORK_LOG file
+    without building the argparse parser. Returns False when the full parser is needed.
+    """
+    filename = os.environ.get("WORK_LOG")
+    if filename is None or len(argv) != 3:
+        return False
+    if argv[0] == "--task":
+        task, flag = argv[1], argv[2]
+    elif argv[1] == "--task":
+        flag, task = argv[0], argv[2]
+    else:
+        return False
+    action = _FAST_ACTIONS.get(flag)
+    if action is None or task.startswith("-"):
+        return False
+    date_key = datetime.datetime.now(datetime.timezone.utc).date()
+    TomlDocument(filename, date_key).update_task(task, action)
+    return True
 
 
 def main():
+    if _fast_update_task(sys.argv[1:]):
+        return
+
+    import argparse
+
     parser = argparse.ArgumentParser("Time tracking GN script")
     parser.add_argument(
         "--file",
@@ -1,12 +1,27 @@
 from __future__ import annotations
+from array import array
+import calendar
 from dataclasses import dataclass, field
-from strenum import StrEnum
 from datetime import datetime, timezone
-from typing import List, Tuple, Optional
+from functools import lru_cache
+from typing import List, Tuple, Optional, Sequence
+import re
+import sys
+import time
 import uuid
 
+if sys.version_info >= (3, 11):
+    from enum import StrEnum
+else:
+    from strenum import StrEnum
+
 
 DATE_FORMAT = "%Y-%m-%dT%H:%M"
+# end of a time that is still running
+OPEN_END = -1
+# whitespace separated words that start with http
+_URL_RE = re.compile(r"(?<!\S)(http\S*)")
+_TEX_TABLE = str.maketrans({"_": "\\_"})
 
 
 class TaskStates(StrEnum):
@@ -16,15 +31,61 @@ class TaskStates(StrEnum):
     COMPLETED = "COMPLETED"
 
 
+def _parse_time(value: str) -> int:
+    """
+    Epoch seconds of a DATE_FORMAT string in UTC, without strptime's overhead.
+    """
+    return calendar.timegm(
+        (
+            int(value[0:4]),
+            int(value[5:7]),
+            int(value[8:10]),
+            int(value[11:13]),
+            int(value[14:16]),
+            0,
+        )
+    )
+
+
+def _format_time(value: int) -> str:
+    t = time.gmtime(value)
+    return (
+        f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}"
+        f"T{t.tm_hour:02d}:{t.tm_min:02d}"
+    )
+
+
+def _to_datetime(value: int) -> Optional[datetime]:
+    if value == OPEN_END:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+def _check_same_day(start: int, end: int) -> None:
+    if start // 86400 != end // 86400:
+        raise RuntimeError("We expect all end dates to happen in the same day")
+
+
+def sum_minutes(starts: Sequence[int], ends: Sequence[int]) -> float:
+    """
+    Total minutes covered by the intervals given as epoch seconds, see Task.intervals.
+    """
+    seconds = 0
+    for i in range(len(starts)):
+        seconds += ends[i] - starts[i]
+    return seconds / 60
+
+
+# descriptions and notes such as "Standup" repeat a lot across a month
+@lru_cache(maxsize=4096)
 def tex_clean_up(sentence: str) -> str:
-    result = []
-    for word in sentence.strip().split():
-        if word.strip().startswith("http"):
-            word = "\\href{" + word + "}{link}"
-        else:
-            word = word.replace("_", "\_")
-        result.append(word)
-    return " ".join(result)
+    words = " ".join(sentence.split())
+    # the capturing group puts links at the odd indices
+    parts = _URL_RE.split(words)
+    return "".join(
+        "\\href{" + part + "}{link}" if i % 2 else part.translate(_TEX_TABLE)
+        for i, part in enumerate(parts)
+    )
 
 
 @dataclass
@@ -32,8 +93,19 @@ class Task:
     uuid: uuid.UUID
     description: str
     status: TaskStates
-    times: List[Tuple[datetime, Optional[datetime]]]
     notes: List[str] = field(default_factory=list)
+    # start and end epoch seconds of each time, end is OPEN_END while running
+    _starts: array[int] = field(default_factory=lambda: array("q"))
+    _ends: array[int] = field(default_factory=lambda: array("q"))
+    # seconds spent in times that have ended, worked out on the first minutes() call
+    _closed_seconds: Optional[int] = field(default=None, repr=False, compare=False)
+    # dict the task was deserialized from, cleared as soon as the task changes
+    _source_dict: Optional[dict] = field(default=None, repr=False, compare=False)
+    _uuid_str: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # deserialized tasks keep the uuid string from the file, so this is usually free
+        self._uuid_str = str(self.uuid)
 
     def tex_description(self):
         main_description = tex_clean_up(self.description)
@@ -46,16 +118,54 @@ class Task:
             main_description += notes_section
         return main_description
 
+    @property
+    def times(self) -> List[Tuple[datetime, Optional[datetime]]]:
+        return [
+            (datetime.fromtimestamp(start, timezone.utc), _to_datetime(end))
+            for start, end in zip(self._starts, self._ends)
+        ]
+
+    def intervals(self) -> Tuple[array[int], array[int]]:
+        """
+        Start and end epoch seconds of each time, running times end now.
+        """
+        ends = self._ends
+        if OPEN_END in ends:
+            now = int(time.time())
+            ends = array("q", (now if end == OPEN_END else end for end in ends))
+        for start, end in zip(self._starts, ends):
+            _check_same_day(start, end)
+        return self._starts, ends
+
     def minutes(self):
-        seconds = 0
-        for start, end in self.times:
-            if not end:
-                end = datetime.now(timezone.utc)
-            if end.date() != start.date():
-                raise RuntimeError("We expect all end dates to happen in the same day")
-            seconds += (end - start).seconds
+        if self._closed_seconds is None:
+            closed_seconds = 0
+            for start, end in zip(self._starts, self._ends):
+                if end != OPEN_END:
+                    _check_same_day(start, end)
+                    closed_seconds += end - start
+            self._closed_seconds = closed_seconds
+        seconds = self._closed_seconds
+        if OPEN_END in self._ends:
+            now = int(time.time())
+            for start, end in zip(self._starts, self._ends):
+                if end == OPEN_END:
+                    _check_same_day(start, now)
+                    seconds += now - start
         return seconds / 60
 
+    def _end_last_time(self):
+        now = int(time.time())
+        self._ends[-1] = now
+        if self._closed_seconds is None:
+            return
+        start = self._starts[-1]
+        if start // 86400 == now // 86400:
+            self._closed_seconds += now - start
+        else:
+            # recomputed, and rejected, by the next minutes() call
+            self._closed_seconds = None
+
     def terminal_report(self):
         status = ""
         notes = "\n".join(f"  - {x}" for x in self.notes)
@@ -66,79 +176,76 @@ class Task:
         return f"- {self.description}: {self.minutes()} {status}{notes}"
 
     def terminal_report_with_uuid(self):
-        return f"{self.uuid} {self.terminal_report()}"
+        return f"{self._uuid_str} {self.terminal_report()}"
 
     def start(self):
+        self._source_dict = None
         if self.status == TaskStates.CREATED or self.status == TaskStates.PAUSED:
             self.status = TaskStates.RUNNING
-        now = datetime.now(timezone.utc)
-        if self.times:
-            prev_start, prev_end = self.times[-1]
-            if not isinstance(prev_start, datetime) or not isinstance(
-                prev_end, datetime
-            ):
-                raise TypeError(f"{self.uuid} has incorrect times: {self.times}")
-        new_times = (now, None)
-        self.times.append(new_times)
+        now = int(time.time())
+        if self._ends and self._ends[-1] == OPEN_END:
+            raise TypeError(f"{self.uuid} has incorrect times: {self.times}")
+        self._starts.append(now)
+        self._ends.append(OPEN_END)
 
     def pause(self):
         if self.status != TaskStates.RUNNING:
             print("Task is not running")
             return
+        self._source_dict = None
         self.status = TaskStates.PAUSED
-        prev_start, prev_end = self.times[-1]
-        if prev_end is not None:
+        if self._ends[-1] != OPEN_END:
             raise TypeError(
                 f"{self.uuid} Previous time had an actual value: {self.times}"
             )
 
-        now = datetime.now(timezone.utc)
-        self.times[-1] = (prev_start, now)
+        self._end_last_time()
 
     def complete(self):
         if self.status != TaskStates.RUNNING:
             print("Task is not running")
             return
+        self._source_dict = None
         self.status = TaskStates.COMPLETED
-        prev_start, prev_end = self.times[-1]
-        if prev_end is not None:
+        if self._ends[-1] != OPEN_END:
             raise TypeError(
                 f"{self.uuid} Previous time had an actual value: {self.times}"
             )
 
-        now = datetime.now(timezone.utc)
-        self.times[-1] = (prev_start, now)
+        self._end_last_time()
 
     def add_note(self, note: str):
+        self._source_dict = None
         self.notes.append(note)
 
 
 class TomlHelper:
     @staticmethod
     def deserialize(toml_dict: dict) -> Task:
-        times = []
-        for x, y in toml_dict.get("times", []):
-            x = datetime.strptime(x, DATE_FORMAT).replace(tzinfo=timezone.utc)
-            y = (
-                None
-                if y.lower() == "none"
-                else datetime.strptime(y, DATE_FORMAT).replace(tzinfo=timezone.utc)
-            )
-            times.append((x, y))
-        toml_dict["times"] = times
+        source_dict = toml_dict
+        toml_dict = dict(toml_dict)
+        starts, ends = array("q"), array("q")
+        for x, y in toml_dict.pop("times", []):
+            starts.append(_parse_time(x))
+            ends.append(OPEN_END if y.lower() == "none" else _parse_time(y))
         if "minutes" in toml_dict:
             del toml_dict["minutes"]
-        return Task(**toml_dict)
+        if "notes" in toml_dict:
+            # add_note must not reach into source_dict
+            toml_dict["notes"] = list(toml_dict["notes"])
+        return Task(
+            **toml_dict, _starts=starts, _ends=ends, _source_dict=source_dict
+        )
 
     @staticmethod
     def serialize(task: Task) -> dict:
         times = []
-        for x, y in task.times:
-            new_start = x.strftime(DATE_FORMAT)
-            new_end = str(y) if y is None else y.strftime(DATE_FORMAT)
+        for x, y in zip(task._starts, task._ends):
+            new_start = _format_time(x)
+            new_end = str(None) if y == OPEN_END else _format_time(y)
             times.append((new_start, new_end))
         return {
-            "uuid": str(task.uuid),
+            "uuid": task._uuid_str,
             "description": task.description,
             "status": str(task.status),
             "times": times,
@@ -0,0 +1,328 @@
+import datetime
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+from gn_work_log import main, tasks
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+DATE = datetime.date(2024, 6, 3)
+EXAMPLE_LOG = (
+    pathlib.Path(__file__).parent.parent / "examples" / "example_work_log.toml"
+)
+
+DUPLICATE_UUID_LOG = """
+version = "0.0.0"
+
+[[2024-06-03]]
+uuid = "aaaa"
+description = "first"
+status = "CREATED"
+times = []
+notes = []
+
+[[2024-06-03]]
+uuid = "aaaa"
+description = "second"
+status = "CREATED"
+times = []
+notes = []
+"""
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "log.toml"
+    path.write_text(DUPLICATE_UUID_LOG)
+    return path
+
+
+@pytest.mark.parametrize("identifier", ["aaaa", "aa"])
+def test_update_task_rejects_duplicate_uuids(log_file, identifier):
+    doc = main.TomlDocument(str(log_file), DATE)
+    with pytest.raises(LookupError, match="More than 1 task found"):
+        doc.update_task(identifier, main.Actions.NOTE, "note")
+    assert log_file.read_text() == DUPLICATE_UUID_LOG
+
+
+def test_update_task_finds_added_task(log_file):
+    doc = main.TomlDocument(str(log_file), DATE)
+    with pytest.raises(LookupError, match="No tasks found"):
+        doc.update_task("zzzz", main.Actions.NOTE, "note")
+    doc.add_task("third", DATE)
+    added = doc.tasks_for(DATE.isoformat())[-1]
+    doc.update_task(added._uuid_str, main.Actions.NOTE, "a note")
+    assert added.notes == ["a note"]
+
+
+def test_write_keeps_symlink_and_mode(tmp_path):
+    log_file = tmp_path / "log.toml"
+    log_file.write_text(DUPLICATE_UUID_LOG)
+    log_file.chmod(0o600)
+    link = tmp_path / "link.toml"
+    link.symlink_to(log_file)
+
+    doc = main.TomlDocument(str(link), DATE)
+    doc.add_task("third", DATE)
+
+    assert link.is_symlink()
+    assert "third" in log_file.read_text()
+    assert log_file.stat().st_mode & 0o777 == 0o600
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["link.toml", "log.toml"]
+
+
+def test_write_failure_removes_tmp_file(log_file, monkeypatch):
+    doc = main.TomlDocument(str(log_file), DATE)
+
+    def fail(*args):
+        raise OSError("replace failed")
+
+    monkeypatch.setattr(main.os, "replace", fail)
+    with pytest.raises(OSError):
+        doc.add_task("third", DATE)
+    assert log_file.read_text() == DUPLICATE_UUID_LOG
+    assert [p.name for p in log_file.parent.iterdir()] == ["log.toml"]
+
+
+def test_monthly_pdf_pipes_whole_document(log_file, monkeypatch):
+    calls = []
+    monkeypatch.setattr(subprocess, "run", lambda *a, **kw: calls.append((a, kw)))
+    main.TomlDocument(str(log_file), DATE).monthly_pdf()
+
+    [(args, kwargs)] = calls
+    flags = args[0]
+    assert not any(f.startswith("-interaction") for f in flags)
+    assert flags[flags.index("-jobname") + 1] == "Work_Log_For_2024_6"
+    document = kwargs["input"].decode()
+    assert document.startswith("\\documentclass{article}")
+    assert document.rstrip().endswith("\\end{document}")
+
+
+@pytest.fixture
+def update_calls(log_file, monkeypatch):
+    """
+    Records update_task calls instead of changing the log.
+    """
+    calls = []
+    monkeypatch.setenv("WORK_LOG", str(log_file))
+    monkeypatch.setattr(
+        main.TomlDocument,
+        "update_task",
+        lambda self, task, action, note=None: calls.append((task, action, note)),
+    )
+    return calls
+
+
+@pytest.mark.parametrize(
+    "argv, action",
+    [
+        (["--task", "aaaa", "--start"], main.Actions.START),
+        (["--start", "--task", "aaaa"], main.Actions.START),
+        (["--task", "aaaa", "--pause"], main.Actions.PAUSE),
+        (["--complete", "--task", "aaaa"], main.Actions.COMPLETE),
+    ],
+)
+def test_fast_update_task_dispatches(update_calls, argv, action):
+    assert main._fast_update_task(argv)
+    assert update_calls == [("aaaa", action, None)]
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--file", "log.toml", "--task", "aaaa", "--start"],
+        ["--date", "2024-06-03", "--task", "aaaa", "--start"],
+        ["--task", "aaaa", "--note"],
+        ["--task", "aaaa", "--note", "a note"],
+        ["--task=aaaa", "--start"],
+        ["--task", "-aaaa", "--start"],
+        ["--start", "--pause", "--task"],
+        ["--report", "--task", "aaaa"],
+    ],
+)
+def test_fast_update_task_falls_through(update_calls, argv):
+    assert not main._fast_update_task(argv)
+    assert update_calls == []
+
+
+def test_fast_update_task_needs_work_log(update_calls, monkeypatch):
+    monkeypatch.delenv("WORK_LOG")
+    assert not main._fast_update_task(["--task", "aaaa", "--start"])
+    assert update_calls == []
+
+
+def test_main_falls_through_to_argparse(update_calls, log_file, monkeypatch):
+    argv = ["work-log", "--file", str(log_file), "--date", "2024-06-03"]
+    monkeypatch.setattr(sys, "argv", argv + ["--task=aaaa", "--start"])
+    main.main()
+    assert update_calls == [("aaaa", main.Actions.START, None)]
+
+
+def test_fast_path_skips_argparse(tmp_path):
+    log_file = tmp_path / "log.toml"
+    log_file.write_text("version = \"0.0.0\"\n")
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    doc = main.TomlDocument(str(log_file), today)
+    doc.add_task("task", today)
+    task = doc.tasks_data[today.isoformat()][0]
+    script = (
+        "import sys\n"
+        "from gn_work_log import main\n"
+        f"sys.argv = ['work-log', '--task', '{task._uuid_str}', '--start']\n"
+        "main.main()\n"
+        "print('argparse' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "WORK_LOG": str(log_file)},
+        cwd=pathlib.Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
+    assert "RUNNING" in log_file.read_text()
+
+
+@pytest.fixture
+def example_log(tmp_path):
+    path = tmp_path / "example.toml"
+    path.write_bytes(EXAMPLE_LOG.read_bytes())
+    return path
+
+
+def test_write_only_reserializes_dirty_days(example_log):
+    parsed = tomllib.loads(example_log.read_text())
+    doc = main.TomlDocument(str(example_log), datetime.date(2024, 6, 5))
+    untouched = {key: doc._raw[key] for key in ("2024-06-03", "2024-06-06")}
+
+    doc.update_task("1b79478f", main.Actions.NOTE, "a note")
+    doc.add_task("new day", datetime.date(2024, 6, 7))
+
+    for key, raw_tasks in untouched.items():
+        assert doc._raw[key] is raw_tasks
+    written = tomllib.loads(example_log.read_text())
+    for key in untouched:
+        assert written[key] == parsed[key]
+    assert written["2024-06-05"] == [{**parsed["2024-06-05"][0], "notes": ["a note"]}]
+    assert [t["description"] for t in written["2024-06-07"]] == ["new day"]
+    assert written["version"] == parsed["version"]
+
+
+def test_write_reuses_parsed_dicts_of_unchanged_tasks(example_log):
+    parsed = tomllib.loads(example_log.read_text())
+    doc = main.TomlDocument(str(example_log), DATE)
+    changed_raw, unchanged_raw = doc._raw["2024-06-03"][1], doc._raw["2024-06-03"][0]
+
+    doc.update_task("1b79478f", main.Actions.NOTE, "a note")
+
+    changed, unchanged = doc._raw["2024-06-03"][1], doc._raw["2024-06-03"][0]
+    assert unchanged is unchanged_raw
+    assert changed is not changed_raw
+    assert changed_raw["notes"] == []
+    written = tomllib.loads(example_log.read_text())
+    assert written["2024-06-03"] == [
+        parsed["2024-06-03"][0],
+        {**parsed["2024-06-03"][1], "notes": ["a note"]},
+    ]
+
+
+PAST_LOG = """
+version = "0.0.0"
+
+[[2024-06-03]]
+uuid = "aaaa"
+description = "running"
+status = "RUNNING"
+times = [["2024-06-03T06:00", "None"]]
+notes = []
+
+[[2024-06-04]]
+uuid = "bbbb"
+description = "done"
+status = "COMPLETED"
+times = [["2024-06-04T06:00", "2024-06-04T07:00"]]
+notes = []
+"""
+
+
+@pytest.fixture
+def past_log(tmp_path, monkeypatch):
+    # errors() reports running times up to now, keep now on the task's day
+    monkeypatch.setattr(tasks.time, "time", lambda: 1717398000)  # 2024-06-03T07:00
+    log_file = tmp_path / "log.toml"
+    log_file.write_text(PAST_LOG)
+    return log_file
+
+
+def test_errors_reports_incomplete_past_tasks(past_log, capsys):
+    doc = main.TomlDocument(str(past_log), DATE)
+    doc.add_task("created", datetime.date(2024, 6, 4))
+    capsys.readouterr()
+
+    doc.errors()
+
+    out = capsys.readouterr().out
+    assert "2024-06-03" in out and "running" in out
+    assert "2024-06-04" in out and "created" in out
+    assert "done" not in out
+
+
+def test_errors_skips_task_completed_in_same_run(past_log, capsys):
+    doc = main.TomlDocument(str(past_log), DATE)
+    doc.update_task("aaaa", main.Actions.COMPLETE)
+    capsys.readouterr()
+
+    doc.errors()
+
+    assert capsys.readouterr().out == "No errors found\n"
+
+
+def completed_day(date: str) -> str:
+    return f"""
+[[{date}]]
+uuid = "{date}"
+description = "work on {date}"
+status = "COMPLETED"
+times = [["{date}T06:00", "{date}T07:00"]]
+notes = []
+"""
+
+
+MONTHS_LOG = 'version = "0.0.0"\n' + "".join(
+    completed_day(date)
+    for date in ("2024-06-30", "2024-05-31", "2024-07-01", "2024-06-01")
+)
+
+
+def test_keys_between_keeps_to_the_month(tmp_path):
+    log_file = tmp_path / "log.toml"
+    log_file.write_text(MONTHS_LOG)
+    doc = main.TomlDocument(str(log_file), DATE)
+
+    june = doc._keys_between(datetime.date(2024, 6, 1), datetime.date(2024, 7, 1))
+
+    assert june == ["2024-06-01", "2024-06-30"]
+
+
+def test_report_monthly_includes_date_added_in_same_run(tmp_path, capsys):
+    log_file = tmp_path / "log.toml"
+    log_file.write_text(MONTHS_LOG)
+    doc = main.TomlDocument(str(log_file), DATE)
+    doc.add_task("added", datetime.date(2024, 6, 15))
+    capsys.readouterr()
+
+    doc.report_monthly()
+
+    lines = capsys.readouterr().out.splitlines()
+    dates = [line for line in lines if line.startswith("2024-")]
+    assert dates == ["2024-06-01", "2024-06-15", "2024-06-30"]
+    assert "- added: 0.0 CREATED" in lines
+    assert lines[-1] == "Total time: 2.0 Hrs 0.0 minutes"
@@ -0,0 +1,175 @@
+import pathlib
+import sys
+from array import array
+from datetime import datetime, timezone
+
+import pytest
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+from gn_work_log import tasks
+
+EXAMPLE_LOG = (
+    pathlib.Path(__file__).parent.parent / "examples" / "example_work_log.toml"
+)
+
+
+def epoch(value: str) -> int:
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+
+
+@pytest.fixture
+def now(monkeypatch):
+    """
+    Controls what the tasks module sees as the current time.
+    """
+    clock = {"now": epoch("2024-06-03T09:00")}
+    monkeypatch.setattr(tasks.time, "time", lambda: clock["now"])
+    return clock
+
+
+def test_deserialize_serialize_round_trip():
+    toml_dict = {
+        "uuid": "60d8dcb7-6c59-4579-8bc3-906c3b08166b",
+        "description": "GUIX OS set up on laptop",
+        "status": "PAUSED",
+        "times": [["2024-06-03T06:00", "2024-06-03T07:30"]],
+        "notes": ["a note"],
+    }
+    task = tasks.TomlHelper.deserialize(toml_dict)
+    assert task.times == [
+        (
+            datetime(2024, 6, 3, 6, 0, tzinfo=timezone.utc),
+            datetime(2024, 6, 3, 7, 30, tzinfo=timezone.utc),
+        )
+    ]
+    assert task.minutes() == 90
+    serialized = tasks.TomlHelper.serialize(task)
+    assert serialized == {
+        **toml_dict,
+        "times": [("2024-06-03T06:00", "2024-06-03T07:30")],
+    }
+
+
+def test_running_time_round_trip(now):
+    task = tasks.TomlHelper.deserialize(
+        {
+            "uuid": "a",
+            "description": "d",
+            "status": "RUNNING",
+            "times": [["2024-06-03T08:00", "None"]],
+        }
+    )
+    assert task.times == [(datetime(2024, 6, 3, 8, 0, tzinfo=timezone.utc), None)]
+    assert task.minutes() == 60
+    assert tasks.TomlHelper.serialize(task)["times"] == [("2024-06-03T08:00", "None")]
+
+
+def test_start_pause_complete(now):
+    task = tasks.Task(uuid="a", description="d", status=tasks.TaskStates.CREATED)
+    task.start()
+    assert task.status == tasks.TaskStates.RUNNING
+    now["now"] += 30 * 60
+    assert task.minutes() == 30
+    task.pause()
+    assert task.status == tasks.TaskStates.PAUSED
+    now["now"] += 60 * 60
+    assert task.minutes() == 30
+    task.start()
+    now["now"] += 15 * 60
+    assert task.minutes() == 45
+    task.complete()
+    assert task.status == tasks.TaskStates.COMPLETED
+    now["now"] += 60 * 60
+    assert task.minutes() == 45
+    assert tasks.TomlHelper.serialize(task)["times"] == [
+        ("2024-06-03T09:00", "2024-06-03T09:30"),
+        ("2024-06-03T10:30", "2024-06-03T10:45"),
+    ]
+
+
+def test_changes_clear_source_dict(now):
+    task = tasks.TomlHelper.deserialize(
+        {"uuid": "a", "description": "d", "status": "CREATED", "times": []}
+    )
+    assert task._source_dict is not None
+    task.start()
+    assert task._source_dict is None
+
+
+def test_add_note_leaves_source_dict_untouched():
+    toml_dict = {
+        "uuid": "a",
+        "description": "d",
+        "status": "CREATED",
+        "times": [],
+        "notes": ["first"],
+    }
+    task = tasks.TomlHelper.deserialize(toml_dict)
+    task.add_note("second")
+    assert task.notes == ["first", "second"]
+    assert toml_dict["notes"] == ["first"]
+
+
+def test_start_while_running_raises(now):
+    task = tasks.Task(uuid="a", description="d", status=tasks.TaskStates.CREATED)
+    task.start()
+    with pytest.raises(TypeError):
+        task.start()
+
+
+def test_example_log_round_trip():
+    data = tomllib.loads(EXAMPLE_LOG.read_text())
+    for date, raw_tasks in data.items():
+        if not isinstance(raw_tasks, list):
+            continue
+        for raw_task in raw_tasks:
+            task = tasks.TomlHelper.deserialize(raw_task)
+            serialized = tasks.TomlHelper.serialize(task)
+            assert serialized["times"] == [tuple(x) for x in raw_task["times"]]
+
+
+def test_example_log_time_on_another_day_than_its_key():
+    # logged under 2024-06-03 but worked on 2024-06-04
+    data = tomllib.loads(EXAMPLE_LOG.read_text())
+    task = tasks.TomlHelper.deserialize(data["2024-06-03"][1])
+    assert task.minutes() == 120
+    starts, ends = task.intervals()
+    assert list(starts) == [epoch("2024-06-04T06:00")]
+    assert list(ends) == [epoch("2024-06-04T08:00")]
+
+
+def test_time_crossing_midnight_raises():
+    task = tasks.TomlHelper.deserialize(
+        {
+            "uuid": "a",
+            "description": "d",
+            "status": "COMPLETED",
+            "times": [["2024-06-03T23:00", "2024-06-04T01:00"]],
+        }
+    )
+    with pytest.raises(RuntimeError):
+        task.minutes()
+    with pytest.raises(RuntimeError):
+        task.intervals()
+
+
+def test_pause_across_midnight_raises_on_minutes(now):
+    now["now"] = epoch("2024-06-03T23:30")
+    task = tasks.Task(uuid="a", description="d", status=tasks.TaskStates.CREATED)
+    task.start()
+    assert task.minutes() == 0
+    now["now"] = epoch("2024-06-04T00:30")
+    task.pause()
+    with pytest.raises(RuntimeError):
+        task.minutes()
+
+
+@pytest.mark.parametrize("n", [0, 3, 300])
+def test_sum_minutes(n):
+    starts = array("q", range(0, n * 120, 120))
+    ends = array("q", range(90, n * 120, 120))
+    assert tasks.sum_minutes(starts, ends) == n * 90 / 60